@@ -1,7 +1,129 @@
+import csv
+import datetime
+import functools
+import math
 import pandas as pd
 import numpy as np
 import os
 
+try:
+    import numba
+except ImportError:  # Numba is optional; plain NumPy is used without it
+    numba = None
+
+
+# Fields stored for every ultrasound entry, in column order
+_ENTRY_FIELDS = (
+    'patient_id', 'timestamp', 'length_cm', 'width_cm', 'depth_cm',
+    'voided_volume_ml', 'context', 'notes', 'calculated_volume_ml', 'source',
+)
+
+# Entry fields that can hold NaN/NaT, written to CSV as empty fields
+_BLANK_IF_MISSING = (
+    'timestamp', 'length_cm', 'width_cm', 'depth_cm', 'voided_volume_ml',
+    'calculated_volume_ml',
+)
+
+# Timestamp format used by both manual and CSV entries (e.g., 2024-01-15 10:30)
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M'
+
+# Columns read from import CSVs and their dtypes; any other column is ignored
+_CSV_COLUMNS = (
+    'patient_id', 'measurement_time', 'length_cm', 'width_cm', 'depth_cm',
+    'voided_volume_ml', 'context', 'notes',
+)
+_CSV_DTYPES = {
+    'patient_id': 'string',
+    'length_cm': 'float64',
+    'width_cm': 'float64',
+    'depth_cm': 'float64',
+    'voided_volume_ml': 'float64',
+    'context': 'category',
+    'notes': 'string',
+}
+
+# Common clinical context values; per-row entries reuse these string objects
+# instead of keeping one copy per row
+_CONTEXT_INTERN = {v: v for v in ('pre_void', 'post_void', 'other', 'unknown')}
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_ts(timestamp_str):
+    """Parse a measurement timestamp, caching repeated strings."""
+    # Blank timestamps are missing (NaT), as pd.to_datetime treats them.
+    # datetime.strptime is used directly: scalar pd.to_datetime is ~10x slower
+    if not timestamp_str:
+        return pd.NaT
+    return pd.Timestamp(datetime.datetime.strptime(timestamp_str, _TIMESTAMP_FORMAT))
+
+
+def _to_float(value):
+    """Convert a raw CSV field to float; blank fields are missing (NaN) as in pandas."""
+    return float(value) if value else math.nan
+
+
+def _calc_vol(length, width, depth):
+    """Ellipsoid formula: V = 4/3 * π * (L/2) * (W/2) * (D/2) = π/6 * L * W * D"""
+    return (math.pi / 6.0) * length * width * depth * 1000.0  # ml
+
+
+_calc_vol_ufunc = _calc_vol
+
+
+if numba is not None:
+    # Use up to 8 threads for the parallel kernels below; NUMBA_NUM_THREADS
+    # is the CPU count Numba detected and the most it allows
+    numba.set_num_threads(min(numba.config.NUMBA_NUM_THREADS, 8))
+    
+    # Fast-math without the no-NaN/no-Inf assumptions (missing dimensions
+    # arrive from CSV files as NaN and must compare the same as in NumPy) and
+    # without reassociation, so compiled volumes match the plain formula exactly
+    _FASTMATH = {'nsz', 'arcp', 'contract', 'afn'}
+    
+    # Compile to a native ufunc at import time (explicit signature) so it
+    # works elementwise on whole arrays without first-call latency
+    _calc_vol_ufunc = numba.vectorize(
+        ['float64(float64, float64, float64)'],
+        nopython=True, fastmath=_FASTMATH, cache=True,
+    )(_calc_vol)
+
+    # The explicit signature compiles the kernel at import time instead of
+    # on the first call. Inputs are typed read-only (writable arrays are
+    # accepted too) since pandas hands out read-only views of its columns.
+    _dims_type = numba.types.Array(numba.float64, 1, 'C', readonly=True)
+    
+    @numba.njit(
+        numba.int64(_dims_type, _dims_type, _dims_type, numba.float64[::1]),
+        parallel=True, fastmath=_FASTMATH, cache=True,
+    )
+    def _compute_volumes(length, width, depth, out):
+        """Fill out with bladder volumes in a single fused pass over L, W, D.
+        
+        Returns the number of rows with a non-positive dimension.
+        """
+        n_invalid = 0
+        for i in numba.prange(length.shape[0]):
+            l = length[i]
+            w = width[i]
+            d = depth[i]
+            if l <= 0 or w <= 0 or d <= 0:
+                n_invalid += 1
+            out[i] = (math.pi / 6.0) * l * w * d * 1000.0
+        return n_invalid
+else:
+    def _compute_volumes(length, width, depth, out):
+        """NumPy equivalent of the compiled kernel used when Numba is available."""
+        # Multiply in place into out so no intermediate arrays are allocated,
+        # in the same order as _calc_vol so both give identical results
+        np.multiply(length, math.pi / 6.0, out=out)
+        out *= width
+        out *= depth
+        out *= 1000.0
+        
+        # One combined bitmap of rows with a non-positive dimension
+        invalid = (length <= 0) | (width <= 0) | (depth <= 0)
+        return np.count_nonzero(invalid)
+
 
 class UltrasoundDataEntry:
     """
@@ -17,17 +139,51 @@ class UltrasoundDataEntry:
     """
   
     def __init__(self):
-              """
-        Initialize an empty list to store ultrasound measurement entries.
+        """
+        Initialize empty storage for ultrasound measurement entries.
         
-        Each entry will be a dictionary containing:
+        Entries are stored column-wise: one list per field, so that building
+        a DataFrame does not require iterating over per-row dictionaries.
+        Each entry contains:
         - Patient identification
         - Timestamp of measurement
         - Bladder dimensions (length, width, depth in cm)
         - Calculated bladder volume (ml)
         - Additional clinical context (voiding data, patient notes, etc)
         """
-        self.entries = []
+        self._cols = {field: [] for field in _ENTRY_FIELDS}
+        self._unsaved_start = 0  # Index of the first entry not yet saved
+    
+    @property
+    def entries(self):
+        """Removed: entries are stored column-wise and no longer kept as a list."""
+        raise AttributeError(
+            "UltrasoundDataEntry.entries is no longer a list; use entries_as_dicts() "
+            "for a copy of the entries, or get_entries() for a DataFrame")
+    
+    @entries.setter
+    def entries(self, value):
+        raise AttributeError(
+            "UltrasoundDataEntry.entries cannot be assigned; add entries with "
+            "manual_entry()/auto_entry() and remove them with clear_entries()")
+    
+    def entries_as_dicts(self):
+        """
+        Get all current entries as a list of dictionaries (one per row).
+        
+        The list is built on each call from the column storage, so changing
+        it does not change the stored entries.
+        """
+        return self._entries_since(0)
+    
+    def _entries_since(self, start):
+        """Entries from index start onwards as a list of dictionaries."""
+        return [dict(zip(self._cols, row)) for row in zip(*(col[start:] for col in self._cols.values()))]
+    
+    def _add_entry(self, entry):
+        """Append a single entry dictionary to the column storage."""
+        for field, col in self._cols.items():
+            col.append(entry[field])
     
     def manual_entry(self):
         """Console-based entry for single ultrasound measurements."""
@@ -48,7 +204,7 @@ class UltrasoundDataEntry:
         # Timestamp handling - critical for matching!
         # Expected format: YYYY-MM-DD HH:MM (e.g., 2024-01-15 10:30)
         timestamp_str = input("Measurement time (YYYY-MM-DD HH:MM): ").strip()
-        measurement_time = pd.to_datetime(timestamp_str)
+        measurement_time = _parse_ts(timestamp_str)
         
         # Bladder dimensions, convert to float
         length = float(input("Length (cm): "))
@@ -59,15 +215,19 @@ class UltrasoundDataEntry:
         voided_volume = input("Voided volume (ml, press Enter if none): ")
         voided_volume = float(voided_volume) if voided_volume else None
 
-       # Get clinical context or other optional notes
+        # Get clinical context or other optional notes
         context = input("Context (pre_void/post_void/other): ").strip()
+        context = _CONTEXT_INTERN.get(context, context)
         
         notes = input("Notes (optional): ").strip()
         
         # Validation
         self._validate_measurements(length, width, depth)
         
-         entry = {
+        # Calculate bladder volume using ellipsoid formula
+        calculated_volume = self._calculate_volume(length, width, depth)
+        
+        entry = {
             'patient_id': patient_id,          # Patient identifier
             'timestamp': measurement_time,     # When measurement was taken
             'length_cm': length,               # Bladder length in cm
@@ -80,11 +240,11 @@ class UltrasoundDataEntry:
             'source': 'manual_entry'           # Track data source
         }
         
-        self.entries.append(entry)
+        self._add_entry(entry)
         print(f"✓ Added entry: {entry['calculated_volume_ml']:.1f} ml")
         return entry
 
-def auto_entry(self, csv_filepath):
+    def auto_entry(self, csv_filepath):
         """
         Import ultrasound measurements from a CSV file.
         
@@ -102,88 +262,174 @@ def auto_entry(self, csv_filepath):
         csv_filepath (str): Path to the CSV file containing measurements
         
         Returns:
-        list: All imported entries as dictionaries
+        list: The entries imported by this call, as dictionaries
         """
         try:
             # Read the entire CSV file into a pandas DataFrame
-            # pandas automatically handles comma-separated values
-            df = pd.read_csv(csv_filepath)
+            # Explicit columns, dtypes and timestamp format let pandas skip
+            # type inference; only the known columns are loaded
+            df = pd.read_csv(
+                csv_filepath,
+                usecols=lambda column: column in _CSV_COLUMNS,
+                dtype=_CSV_DTYPES,
+                parse_dates=['measurement_time'],
+                date_format=_TIMESTAMP_FORMAT,
+                cache_dates=True,
+            )
             
             # Inform user about successful file loading
             print(f"📁 Loaded {len(df)} entries from {csv_filepath}")
             
-            # Process each row in the CSV file
-            for idx, row in df.iterrows():
-                # Convert the current row to a properly formatted entry
-                entry = self._process_csv_row(row)
-                
-                # Add the entry to the collection
-                self.entries.append(entry)
-                
-                # Provide progress feedback
-                print(f"  ✓ Added entry {idx+1}: {entry['calculated_volume_ml']:.1f} ml")
+            # Work column-wise rather than row-by-row: every field below is
+            # converted/cleaned with a single vectorized operation
+            
+            # read_csv has already parsed the column if every value matched
+            # the format; otherwise it is left as strings and this raises
+            measurement_time = pd.to_datetime(df['measurement_time'], format=_TIMESTAMP_FORMAT, cache=True)
+            
+            # Extract bladder dimensions as contiguous float arrays, the layout
+            # the volume kernel is vectorized for
+            length = np.ascontiguousarray(df['length_cm'].to_numpy(dtype=np.float64))
+            width = np.ascontiguousarray(df['width_cm'].to_numpy(dtype=np.float64))
+            depth = np.ascontiguousarray(df['depth_cm'].to_numpy(dtype=np.float64))
+            
+            # Calculate bladder volume for every row at once, checking that
+            # dimensions are positive numbers in the same pass
+            calculated_volume = np.empty_like(length)
+            if _compute_volumes(length, width, depth, calculated_volume):
+                # Locate the offending dimension and row for the error message
+                self._validate_bulk(length, 'Length')
+                self._validate_bulk(width, 'Width')
+                self._validate_bulk(depth, 'Depth')
+            
+            # Optional columns may be absent from the CSV entirely
+            missing = pd.Series(pd.NA, index=df.index, dtype='string')
+            
+            # Optional voided volume, None where not recorded
+            voided_volume = df.get('voided_volume_ml', missing).astype(np.float64)
+            voided_volume = voided_volume.astype(object).where(voided_volume.notna(), None)
+            
+            # Missing patient IDs are stored as '' (as in auto_entry_stream)
+            # rather than pd.NA, which save_to_csv would write out as '<NA>'
+            patient_id = df['patient_id'].str.strip().fillna('')
+            
+            # Clinical context with default value, and optional notes
+            context = df.get('context', missing).str.strip().str.lower().fillna('unknown')
+            notes = df.get('notes', missing).str.strip().fillna('')
+            
+            # Assemble the standardized entries and extend each column in one call
+            imported = pd.DataFrame({
+                'patient_id': patient_id,
+                'timestamp': measurement_time,
+                'length_cm': length,
+                'width_cm': width,
+                'depth_cm': depth,
+                'voided_volume_ml': voided_volume,
+                'context': context,
+                'notes': notes,
+                'calculated_volume_ml': calculated_volume,
+                'source': 'csv_import'  # Track that this came from CSV
+            })
+            start = len(self._cols['patient_id'])
+            for field, col in self._cols.items():
+                col.extend(imported[field].tolist())
             
             # Summary of import operation
             print(f"✅ Successfully added {len(df)} entries from CSV")
             
-            return self.entries
+            return self._entries_since(start)
             
         except FileNotFoundError:
             # Handle case where the specified CSV file doesn't exist
             print(f"❌ File not found: {csv_filepath}")
             return []
     
-    def _process_csv_row(self, row):
+    def auto_entry_stream(self, csv_filepath):
         """
-        Convert a single CSV row into a standardized ultrasound entry.
+        Import ultrasound measurements from a CSV file one row at a time.
         
-        This internal method extracts and formats data from a CSV row.
-        It assumes the CSV has the exact column names specified in auto_entry.
+        Uses the same CSV format as auto_entry, but reads it with the csv
+        module instead of loading the whole file into a DataFrame, so only
+        one row is held in memory at a time. Prefer this for very large
+        files or when per-row logic cannot be vectorized.
+        
+        Parameters:
+        csv_filepath (str): Path to the CSV file containing measurements
+        
+        Returns:
+        list: The entries imported by this call, as dictionaries
+        """
+        try:
+            with open(csv_filepath, newline='') as f:
+                reader = csv.DictReader(f)
+                
+                start = len(self._cols['patient_id'])
+                
+                # Bind the per-row lookups to locals once, outside the loop
+                process_row = self._process_csv_row_dict
+                appends = [(field, col.append) for field, col in self._cols.items()]
+                
+                count = 0
+                for row in reader:
+                    entry = process_row(row)
+                    for field, append in appends:
+                        append(entry[field])
+                    count += 1
+                    
+                    # Occasional progress feedback; printing every row would
+                    # cost more than processing it
+                    if count % 10000 == 0:
+                        print(f"  ✓ Added {count} entries so far")
+            
+            # Summary of import operation
+            print(f"✅ Successfully added {count} entries from {csv_filepath}")
+            
+            return self._entries_since(start)
+            
+        except FileNotFoundError:
+            # Handle case where the specified CSV file doesn't exist
+            print(f"❌ File not found: {csv_filepath}")
+            return []
+    
+    def _process_csv_row_dict(self, row):
+        """
+        Convert a single csv.DictReader row into a standardized ultrasound entry.
         
         Parameters:
-        row (pd.Series): A single row from the pandas DataFrame
+        row (dict): A single CSV row mapping column names to raw strings
         
         Returns:
         dict: Formatted ultrasound entry
         """
         # Extract and clean patient ID
-        patient_id = str(row['patient_id']).strip()
+        patient_id = row['patient_id'].strip()
         
-        # Extract and parse timestamp
-        # Convert string to datetime for consistency with manual entries
-        timestamp_str = str(row['measurement_time']).strip()
-        measurement_time = pd.to_datetime(timestamp_str)
+        # Extract and parse timestamp (cached for repeated timestamps)
+        measurement_time = _parse_ts(row['measurement_time'].strip())
         
-        # Extract bladder dimensions
-        # Convert to float for mathematical operations
-        length = float(row['length_cm'])
-        width = float(row['width_cm'])
-        depth = float(row['depth_cm'])
+        # Extract bladder dimensions; blanks become NaN, as in auto_entry
+        length = _to_float(row['length_cm'])
+        width = _to_float(row['width_cm'])
+        depth = _to_float(row['depth_cm'])
         
         # Validate that dimensions are positive numbers
         self._validate_measurements(length, width, depth)
         
-        # Handle optional voided volume field
-        # Check if column exists and has a value
-        voided_volume = None
-        if 'voided_volume_ml' in row and pd.notna(row['voided_volume_ml']):
-            voided_volume = float(row['voided_volume_ml'])
+        # Optional fields are missing or empty strings when not recorded
+        voided_volume = row.get('voided_volume_ml')
+        voided_volume = float(voided_volume) if voided_volume else None
         
-        # Extract clinical context with default value
-        context = 'unknown'
-        if 'context' in row and pd.notna(row['context']):
-            context = str(row['context']).strip().lower()
+        context = (row.get('context') or '').strip().lower() or 'unknown'
+        context = _CONTEXT_INTERN.get(context, context)
         
-        # Extract optional notes
-        notes = ''
-        if 'notes' in row and pd.notna(row['notes']):
-            notes = str(row['notes']).strip()
+        notes = (row.get('notes') or '').strip()
         
-        # Calculate bladder volume using ellipsoid formula
-        calculated_volume = self._calculate_volume(length, width, depth)
+        # Calculate bladder volume using ellipsoid formula. The plain Python
+        # formula is used directly: for one row of scalars, ufunc dispatch
+        # would cost more than the arithmetic itself
+        calculated_volume = _calc_vol(length, width, depth)
         
-        # Create standardized entry dictionary
-        entry = {
+        return {
             'patient_id': patient_id,
             'timestamp': measurement_time,
             'length_cm': length,
@@ -195,9 +441,6 @@ def auto_entry(self, csv_filepath):
             'calculated_volume_ml': calculated_volume,
             'source': 'csv_import'  # Track that this came from CSV
         }
-        
-        return entry
-    
     
     def _validate_measurements(self, length, width, depth):
         """Basic sanity checks - accept any positive number"""
@@ -208,22 +451,47 @@ def auto_entry(self, csv_filepath):
         if depth <= 0:
             raise ValueError(f"Depth must be positive, got {depth}cm")
     
+    def _validate_bulk(self, arr, name):
+        """Vectorized version of _validate_measurements for a whole column"""
+        bad = arr <= 0
+        if bad.any():
+            idx = np.flatnonzero(bad)[0]
+            raise ValueError(f"{name} must be positive, got {arr[idx]}cm at row {idx}")
+    
     def _calculate_volume(self, length, width, depth):
         """Ellipsoid formula: V = 4/3 * π * (L/2) * (W/2) * (D/2)"""  #Following ellipsoid formula to calculate a bladder volume
-      #Will consult Urologist on this matter on best way/formula to attain the ground truth estimation.
-        return (4/3) * np.pi * (length/2) * (width/2) * (depth/2) * 1000  # ml
+        #Will consult Urologist on this matter on best way/formula to attain the ground truth estimation.
+        # Arrays go through the compiled ufunc; single values use the plain
+        # formula, which returns a float and avoids ufunc dispatch overhead
+        if isinstance(length, np.ndarray):
+            return _calc_vol_ufunc(length, width, depth)
+        return _calc_vol(length, width, depth)
     
     def save_to_csv(self, filename='ultrasound_measurements.csv'):
-        """Append to growing CSV file"""
-        df = pd.DataFrame(self.entries)
+        """Append entries added since the last save to growing CSV file"""
+        start = self._unsaved_start
         
-        # Append if file exists, create new otherwise
-        if os.path.exists(filename):
-            existing = pd.read_csv(filename)
-            df = pd.concat([existing, df], ignore_index=True)
+        # csv.writer would write missing floats/timestamps as 'nan'/'NaT';
+        # write them as empty fields, as DataFrame.to_csv does
+        columns = [
+            ['' if pd.isna(value) else value for value in col[start:]]
+            if field in _BLANK_IF_MISSING else col[start:]
+            for field, col in self._cols.items()
+        ]
+        rows = zip(*columns)
         
-        df.to_csv(filename, index=False)
-        print(f"Saved {len(df)} entries to {filename}")
+        # Append if file exists, create new (with header) otherwise.
+        # Rows are written straight from the column lists without building
+        # a DataFrame, and the existing file is never re-read.
+        with open(filename, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if os.path.getsize(filename) == 0:
+                writer.writerow(_ENTRY_FIELDS)
+            writer.writerows(rows)
+        
+        saved = len(self._cols['patient_id']) - start
+        self._unsaved_start += saved
+        print(f"Saved {saved} entries to {filename}")
 
     def get_entries(self):
         """
@@ -232,9 +500,12 @@ def auto_entry(self, csv_filepath):
         Returns:
         pd.DataFrame: All ultrasound entries in tabular format
         """
-        # Convert list of dictionaries to DataFrame
-        # Each dictionary becomes a row, keys become column names
-        return pd.DataFrame(self.entries)
+        # Each stored column list becomes a DataFrame column directly
+        df = pd.DataFrame(self._cols, copy=False)
+        
+        # Context only takes a few distinct values; store it as categories
+        df['context'] = pd.Categorical(df['context'])
+        return df
     
     def clear_entries(self):
         """
@@ -242,5 +513,6 @@ def auto_entry(self, csv_filepath):
         
         Useful for starting fresh without creating a new instance.
         """
-        self.entries = []
+        self._cols = {field: [] for field in _ENTRY_FIELDS}
+        self._unsaved_start = 0
         print("Cleared all entries from memory")